@@ -4595,8 +4595,9 @@ class Symbol(object):
         value of the symbol. For other symbol types, check whether the
         visibility is non-n.
         """
-        if self.orig_type in _BOOL_TRISTATE and value in STR_TO_TRI:
-            value = STR_TO_TRI[value]
+        if self.orig_type in _BOOL_TRISTATE:
+            # Translate "n"/"m"/"y" to 0/1/2 with a single lookup
+            value = STR_TO_TRI.get(value, value)
 
         # If the new user value matches the old, nothing changes, and we can
         # avoid invalidating cached values.
@@ -5254,8 +5255,7 @@ class Choice(object):
         Choice.assignable attribute to see what values are currently in range
         and would actually be reflected in the mode of the choice.
         """
-        if value in STR_TO_TRI:
-            value = STR_TO_TRI[value]
+        value = STR_TO_TRI.get(value, value)
 
         if value == self.user_value:
             # We know the value must be valid if it was successfully set
@@ -29,12 +29,8 @@ from __future__ import print_function
 
 import sys
 
-from kconfiglib import Symbol, Choice, BOOL, TRISTATE, HEX, standard_kconfig
-
-
-# Python 2/3 compatibility hack
-if sys.version_info[0] < 3:
-    input = raw_input
+from kconfiglib import Symbol, Choice, MENU, BOOL, TRISTATE, HEX, \
+                       expr_value, standard_kconfig
 
 
 def _main():
@@ -47,11 +43,32 @@ def _main():
     kconf = standard_kconfig(__doc__)
     print(kconf.load_config())
 
+    # Only menu nodes for symbols and choices with prompts can ever be
+    # prompted for, and that doesn't change between passes. Collect them once
+    # up front (along with the menus that contain them, see _collect_nodes())
+    # instead of walking the entire tree on each pass. Visibility and user
+    # values can change while prompting, so oldconfig() still checks those.
+    nodes = []
+    _collect_nodes(kconf.top_node.list, nodes)
+
     while True:
         conf_changed = False
 
-        for node in kconf.node_iter():
-            oldconfig(node)
+        i = 0
+        while i < len(nodes):
+            node, menu_end = nodes[i]
+
+            if menu_end is None:
+                oldconfig(node)
+                i += 1
+
+            # Menu dependencies and 'visible if' conditions propagate to the
+            # prompts of all items in the menu, so nothing in an invisible
+            # menu can be prompted for. Skip over its contents.
+            elif expr_value(node.dep) and expr_value(node.visibility):
+                i += 1
+            else:
+                i = menu_end
 
         if not conf_changed:
             break
@@ -59,6 +76,41 @@ def _main():
     print(kconf.write_config())
 
 
+def _collect_nodes(node, nodes):
+    # Appends entries for 'node', its siblings, and their descendants to
+    # 'nodes', in Kconfig definition order.
+    #
+    # Menu nodes for symbols and choices with prompts are appended as
+    # (node, None) tuples. Non-empty menus are appended as (node, end)
+    # tuples, where 'end' is the index in 'nodes' just past the menu's
+    # contents, which lets _main() skip the contents of invisible menus.
+
+    while node:
+        if node.item is MENU:
+            menu_i = len(nodes)
+            nodes.append(None)  # Placeholder, filled in below
+
+            _collect_nodes(node.list, nodes)
+
+            if len(nodes) == menu_i + 1:
+                # Nothing in the menu can be prompted for
+                del nodes[menu_i]
+            else:
+                nodes[menu_i] = (node, len(nodes))
+
+        else:
+            if isinstance(node.item, (Symbol, Choice)) and node.prompt:
+                nodes.append((node, None))
+
+            # Symbols can have children (for 'menuconfig' symbols and symbols
+            # that other symbols depend on), and choices contain their choice
+            # symbols
+            if node.list:
+                _collect_nodes(node.list, nodes)
+
+        node = node.next
+
+
 def oldconfig(node):
     """
     Prompts the user for a value if node.item is a visible symbol/choice with
@@ -95,12 +147,18 @@ def oldconfig(node):
         if sym.choice and sym.choice.tri_value == 2:
             return
 
+        # The symbol's type and value don't change until the user enters a
+        # valid value (which ends the loop), so look them up and generate the
+        # prompt just once
+        is_hex = sym.type == HEX
+        old_str_val = sym.str_value
+        prompt = "{} ({}) [{}] ".format(
+            node.prompt[0], _name_and_loc_str(sym), _default_value_str(sym))
+
         # Loop until the user enters a valid value or enters a blank string
         # (for the default value)
         while True:
-            val = input("{} ({}) [{}] ".format(
-                node.prompt[0], _name_and_loc_str(sym),
-                _default_value_str(sym)))
+            val = _input(prompt)
 
             if val == "?":
                 _print_help(node)
@@ -109,16 +167,14 @@ def oldconfig(node):
             # Substitute a blank string with the default value the symbol
             # would get
             if not val:
-                val = sym.str_value
+                val = old_str_val
 
             # Automatically add a "0x" prefix for hex symbols, like the
             # menuconfig interface does. This isn't done when loading .config
             # files, hence why set_value() doesn't do it automatically.
-            if sym.type == HEX and not val.startswith(("0x", "0X")):
+            if is_hex and not val.startswith(("0x", "0X")):
                 val = "0x" + val
 
-            old_str_val = sym.str_value
-
             # Kconfiglib itself will print a warning here if the value
             # is invalid, so we don't need to bother
             if sym.set_value(val):
@@ -156,21 +212,34 @@ def oldconfig(node):
             # No y-visible choice value symbols
             return
 
+        # The selection can't change until the user makes a valid choice, so
+        # the menu text (along with the 'choice[1-N]: ' prompt) can be
+        # generated up front and reprinted as-is if the user asks for help or
+        # enters an invalid index. It's written out with a single write.
+        menu_lines = ["{} ({})".format(node.prompt[0],
+                                       _name_and_loc_str(choice))]
+
+        for i, sym in enumerate(options, 1):
+            menu_lines.append("{} {}. {} ({})".format(
+                ">" if sym is choice.selection else " ",
+                i,
+                # Assume people don't define choice symbols with multiple
+                # prompts. That generates a warning anyway.
+                sym.nodes[0].prompt[0],
+                sym.name))
+
+        menu_lines.append("choice[1-{}]: ".format(len(options)))
+        menu_str = "\n".join(menu_lines)
+
+        # Maps valid index strings ("1", "2", ...) to choice symbols. Looking
+        # up the input here avoids int() and the ValueError it raises for
+        # invalid input.
+        index_to_sym = {str(i): sym for i, sym in enumerate(options, 1)}
+
         # Loop until the user enters a valid selection or a blank string (for
         # the default selection)
         while True:
-            print("{} ({})".format(node.prompt[0], _name_and_loc_str(choice)))
-
-            for i, sym in enumerate(options, 1):
-                print("{} {}. {} ({})".format(
-                    ">" if sym is choice.selection else " ",
-                    i,
-                    # Assume people don't define choice symbols with multiple
-                    # prompts. That generates a warning anyway.
-                    sym.nodes[0].prompt[0],
-                    sym.name))
-
-            sel_index = input("choice[1-{}]: ".format(len(options)))
+            sel_index = _input(menu_str)
 
             if sel_index == "?":
                 _print_help(node)
@@ -181,22 +250,17 @@ def oldconfig(node):
                 choice.selection.set_value(2)
                 break
 
-            try:
-                sel_index = int(sel_index)
-            except ValueError:
-                print("Bad index", file=sys.stderr)
-                continue
-
-            if not 1 <= sel_index <= len(options):
+            sel_sym = index_to_sym.get(sel_index.strip())
+            if sel_sym is None:
                 print("Bad index", file=sys.stderr)
                 continue
 
             # Valid selection
 
-            if options[sel_index - 1].tri_value != 2:
+            if sel_sym.tri_value != 2:
                 conf_changed = True
 
-            options[sel_index - 1].set_value(2)
+            sel_sym.set_value(2)
             break
 
         # Give all of the non-selected visible choice symbols the user value n.
@@ -216,11 +280,39 @@ def _name_and_loc_str(sc):
     # Helper for printing the name of the symbol/choice 'sc' along with the
     # location(s) in the Kconfig files where it is defined. Unnamed choices
     # return "choice" instead of the name.
+    #
+    # The string never changes, so it's cached in _name_and_loc_strs. This
+    # avoids rebuilding it each time the user enters an invalid value.
+
+    if sc not in _name_and_loc_strs:
+        _name_and_loc_strs[sc] = "{}, defined at {}".format(
+            sc.name or "choice",
+            ", ".join("{}:{}".format(node.filename, node.linenr)
+                      for node in sc.nodes))
+
+    return _name_and_loc_strs[sc]
+
+
+# Symbol/Choice -> string cache used by _name_and_loc_str(). Symbol and Choice
+# use __slots__, so the string can't be stored on the item itself.
+_name_and_loc_strs = {}
+
+
+def _input(prompt):
+    # Like input(), but writes the prompt and reads the line directly via
+    # sys.stdout/sys.stdin. This skips the extra flushing and wrapping done by
+    # input(), which adds up when answers are piped in for large
+    # configurations. Also avoids raw_input()/input() differences between
+    # Python 2 and 3.
+
+    sys.stdout.write(prompt)
+    sys.stdout.flush()
+
+    line = sys.stdin.readline()
+    if not line:
+        raise EOFError("EOF when reading a line")
 
-    return "{}, defined at {}".format(
-        sc.name or "choice",
-        ", ".join("{}:{}".format(node.filename, node.linenr)
-                  for node in sc.nodes))
+    return line[:-1] if line.endswith("\n") else line
 
 
 def _print_help(node):